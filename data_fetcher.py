@@ -6,10 +6,15 @@ This module handles fetching historical stock data for:
 - Individual S&P sector ETFs
 """
 
+import hashlib
+import io
+import os
+import sys
+import numpy as np
 import pandas as pd
 import yfinance as yf
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
 
 
 # S&P 500 ETF ticker
@@ -30,14 +35,177 @@ SECTOR_TICKERS = {
     'Materials': 'XLB'
 }
 
+# Directory for cached downloads (daily bars before today never change)
+CACHE_DIR = '.cache'
 
-def fetch_spy_data(start_date: datetime, end_date: datetime) -> pd.Series:
+# Results of fetch_all_data calls made in this process, keyed by requested dates
+_FETCH_ALL_CACHE: Dict[tuple, Tuple[pd.Series, pd.DataFrame]] = {}
+
+
+def _download_history(tickers: List[str], start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """
+    Download daily history for several tickers in a single batched request.
+    
+    yfinance fetches the tickers concurrently; one worker per ticker lets every
+    request be in flight at once instead of being capped by CPU count.
+    
+    Args:
+        tickers: Ticker symbols to download
+        start_date: Start date for data retrieval
+        end_date: End date for data retrieval
+    
+    Returns:
+        DataFrame with (ticker, field) column levels, e.g. history['SPY']['Close']
+    """
+    return yf.download(
+        tickers=" ".join(tickers),
+        start=start_date,
+        end=end_date,
+        group_by='ticker',
+        auto_adjust=True,
+        threads=len(tickers),
+        progress=False
+    )
+
+
+def _extract_closes(history: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+    """
+    Pull the closing prices out of a batched download as one aligned frame.
+    
+    Args:
+        history: DataFrame returned by _download_history
+        tickers: Ticker symbols to extract, in column order
+    
+    Returns:
+        DataFrame with one column of closing prices per ticker
+        (all NaN for tickers missing from the download)
+    """
+    # Older yfinance versions return flat columns for a single-ticker download
+    if not isinstance(history.columns, pd.MultiIndex):
+        return history[['Close']].set_axis(tickers[:1], axis=1)
+    
+    return history.xs('Close', axis=1, level=1).reindex(columns=tickers)
+
+
+def _cache_path(tickers: List[str]) -> str:
+    """
+    Build the cache file path for a set of tickers.
+    
+    Args:
+        tickers: Ticker symbols in the download
+    
+    Returns:
+        Path of the pickle file holding the cached download
+    """
+    key = hashlib.md5(" ".join(sorted(tickers)).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"history_{key}.pkl")
+
+
+def _closes_match(cached: pd.DataFrame, fresh: pd.DataFrame, day: pd.Timestamp) -> bool:
+    """
+    Check whether a cached download and a fresh one agree on one day's closes.
+    
+    Args:
+        cached: Previously cached download
+        fresh: Newly downloaded history overlapping the cache
+        day: Date present in both downloads
+    
+    Returns:
+        True if every close present in both downloads matches on that day
+    """
+    if day not in fresh.index:
+        return False
+    
+    close_cols = [
+        c for c in cached.columns
+        if (c[-1] if isinstance(c, tuple) else c) == 'Close' and c in fresh.columns
+    ]
+    return np.allclose(
+        cached.loc[day, close_cols].to_numpy(dtype=float),
+        fresh.loc[day, close_cols].to_numpy(dtype=float),
+        rtol=1e-6,
+        equal_nan=True
+    )
+
+
+def _fetch_history(tickers: List[str], start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """
+    Download daily history, reusing an on-disk cache of earlier downloads.
+    
+    A cache written on or after a past end_date is returned as-is. Otherwise a
+    cache that covers start_date only has its tail refetched and appended; this
+    always happens when end_date is today, so a partial intraday bar stored by
+    an earlier run is replaced. If the refetched
+    overlap day disagrees with the cache, Yahoo has re-adjusted history (dividend
+    or split), so the full range is downloaded again.
+    
+    Args:
+        tickers: Ticker symbols to download
+        start_date: Start date for data retrieval
+        end_date: End date for data retrieval
+    
+    Returns:
+        DataFrame in the same layout as _download_history
+    """
+    path = _cache_path(tickers)
+    cached = None
+    
+    if os.path.exists(path):
+        try:
+            cached = pd.read_pickle(path)
+        except Exception as e:
+            print(f"⚠ Warning: Ignoring unreadable cache {path}: {str(e)}")
+    
+    # The cache remembers the start date it was downloaded from, since the
+    # first trading day can fall after a weekend or holiday start date
+    if cached is not None and (
+        cached.empty or cached.attrs.get('start_date', cached.index.min()) > pd.Timestamp(start_date)
+    ):
+        cached = None
+    
+    if cached is None:
+        history = _download_history(tickers, start_date, end_date)
+        history.attrs['start_date'] = pd.Timestamp(start_date)
+    elif end_date.date() < date.today() and (
+        date.fromtimestamp(os.path.getmtime(path)) >= end_date.date()
+    ):
+        print(f"✓ Using cached data for {len(tickers)} ticker(s) from {path}")
+        history = cached
+    else:
+        # Refetch from the last complete cached day so it can be compared
+        overlap = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+        tail = _download_history(tickers, overlap.to_pydatetime(), end_date)
+        
+        if tail.empty:
+            history = cached
+        elif _closes_match(cached, tail, overlap):
+            print(f"✓ Using cached data for {len(tickers)} ticker(s), fetched {len(tail)} new day(s)")
+            history = pd.concat([cached[cached.index < overlap], tail])
+            history.attrs['start_date'] = cached.attrs.get('start_date', cached.index.min())
+        else:
+            print("⚠ Cached prices were re-adjusted upstream, downloading full history")
+            history = _download_history(tickers, start_date, end_date)
+            history.attrs['start_date'] = pd.Timestamp(start_date)
+    
+    if not history.empty and history is not cached:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        history.to_pickle(path)
+    
+    return history.loc[(history.index >= pd.Timestamp(start_date)) & (history.index < pd.Timestamp(end_date))]
+
+
+def fetch_spy_data(
+    start_date: datetime,
+    end_date: datetime,
+    history: Optional[pd.DataFrame] = None
+) -> pd.Series:
     """
     Fetch S&P 500 historical data.
     
     Args:
         start_date: Start date for data retrieval
         end_date: End date for data retrieval
+        history: Pre-fetched batched download to slice (if None, downloads SPY alone)
     
     Returns:
         Series with closing prices indexed by date
@@ -45,13 +213,16 @@ def fetch_spy_data(start_date: datetime, end_date: datetime) -> pd.Series:
     print(f"Fetching S&P 500 (SPY) data from {start_date.date()} to {end_date.date()}...")
     
     try:
-        spy = yf.Ticker(SPY_TICKER)
-        data = spy.history(start=start_date, end=end_date)
+        if history is None:
+            history = _fetch_history([SPY_TICKER], start_date, end_date)
         
-        if data.empty:
+        closing_prices = _extract_closes(history, [SPY_TICKER])[SPY_TICKER].dropna()
+        
+        if closing_prices.empty:
             raise ValueError(f"No data retrieved for {SPY_TICKER}")
         
-        closing_prices = data['Close']
+        # float32 keeps ~7 significant digits, plenty for daily closes, at half the memory traffic
+        closing_prices = closing_prices.astype(np.float32).rename('Close')
         print(f"✓ Successfully fetched {len(closing_prices)} days of S&P 500 data")
         return closing_prices
     
@@ -59,41 +230,46 @@ def fetch_spy_data(start_date: datetime, end_date: datetime) -> pd.Series:
         raise Exception(f"Error fetching S&P 500 data: {str(e)}")
 
 
-def fetch_sector_data(start_date: datetime, end_date: datetime) -> pd.DataFrame:
+def fetch_sector_data(
+    start_date: datetime,
+    end_date: datetime,
+    history: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
     """
     Fetch historical data for all S&P sector ETFs.
     
+    All sector tickers are requested in one batched download rather than
+    one request per ticker.
+    
     Args:
         start_date: Start date for data retrieval
         end_date: End date for data retrieval
+        history: Pre-fetched batched download to slice (if None, downloads all sectors)
     
     Returns:
         DataFrame with closing prices for each sector, columns are sector names
     """
     print(f"\nFetching sector ETF data from {start_date.date()} to {end_date.date()}...")
     
-    sector_data = {}
+    if history is None:
+        try:
+            history = _fetch_history(list(SECTOR_TICKERS.values()), start_date, end_date)
+        except Exception as e:
+            raise Exception(f"Failed to fetch data for all sectors: {str(e)}")
+    
+    # Close level of the batched download is already aligned on one index
+    closes = _extract_closes(history, list(SECTOR_TICKERS.values()))
+    days = closes.count()
     failed_tickers = []
     
     for sector_name, ticker in SECTOR_TICKERS.items():
-        try:
-            print(f"  Fetching {sector_name} ({ticker})...", end=' ')
-            stock = yf.Ticker(ticker)
-            data = stock.history(start=start_date, end=end_date)
-            
-            if data.empty:
-                print(f"✗ No data")
-                failed_tickers.append((sector_name, ticker))
-                continue
-            
-            sector_data[sector_name] = data['Close']
-            print(f"✓ {len(data)} days")
-        
-        except Exception as e:
-            print(f"✗ Error: {str(e)}")
+        if days[ticker] == 0:
+            print(f"  {sector_name} ({ticker}): ✗ No data")
             failed_tickers.append((sector_name, ticker))
+        else:
+            print(f"  {sector_name} ({ticker}): ✓ {days[ticker]} days")
     
-    if not sector_data:
+    if len(failed_tickers) == len(SECTOR_TICKERS):
         raise Exception("Failed to fetch data for all sectors")
     
     if failed_tickers:
@@ -101,8 +277,11 @@ def fetch_sector_data(start_date: datetime, end_date: datetime) -> pd.DataFrame:
         for sector, ticker in failed_tickers:
             print(f"  - {sector} ({ticker})")
     
-    # Convert to DataFrame
-    df = pd.DataFrame(sector_data)
+    # Name columns by sector (float32, like the S&P 500 series)
+    df = closes.drop(columns=[ticker for _, ticker in failed_tickers])
+    df = df.rename(columns={ticker: name for name, ticker in SECTOR_TICKERS.items()})
+    df.columns.name = None
+    df = df.astype(np.float32)
     print(f"\n✓ Successfully fetched data for {len(df.columns)} sectors")
     
     return df
@@ -122,26 +301,54 @@ def fetch_all_data(
         years_back: Number of years to look back (used if start_date is None)
     
     Returns:
-        Tuple of (S&P 500 prices, Sector prices DataFrame)
+        Tuple of (S&P 500 prices, Sector prices DataFrame). Both share the
+        same DatetimeIndex, so downstream calculations can skip re-alignment.
+        Repeat calls for the same dates within one process return the same
+        objects, so callers should not modify them in place.
     """
+    # Key on calendar days: the default end date is datetime.now(), which
+    # would otherwise never repeat
+    cache_key = (
+        end_date.date() if end_date else date.today(),
+        years_back,
+        start_date.date() if start_date else None
+    )
+    if cache_key in _FETCH_ALL_CACHE:
+        print("✓ Using S&P 500 and sector data already fetched in this session")
+        return _FETCH_ALL_CACHE[cache_key]
+    
     # Set default dates if not provided
     if end_date is None:
         end_date = datetime.now()
     
     if start_date is None:
-        start_date = end_date - timedelta(days=years_back * 365)
+        # Calendar years (accounts for leap days, unlike years * 365 days)
+        start_date = (pd.Timestamp(end_date) - pd.DateOffset(years=years_back)).to_pydatetime()
+    
+    # Download S&P 500 and every sector ETF in one batched request
+    tickers = [SPY_TICKER] + list(SECTOR_TICKERS.values())
+    try:
+        history = _fetch_history(tickers, start_date, end_date)
+    except Exception as e:
+        raise Exception(f"Error fetching market data: {str(e)}")
     
     # Fetch S&P 500 data
-    spy_prices = fetch_spy_data(start_date, end_date)
+    spy_prices = fetch_spy_data(start_date, end_date, history=history)
     
     # Fetch sector data
-    sector_prices = fetch_sector_data(start_date, end_date)
+    sector_prices = fetch_sector_data(start_date, end_date, history=history)
     
     # Align to S&P 500 dates (S&P is the reference, sectors may have different start dates)
-    # This ensures we have S&P data for all dates, but sectors can have NaN for early dates
-    all_dates = spy_prices.index.union(sector_prices.index).sort_values()
-    spy_prices = spy_prices.reindex(all_dates)
-    sector_prices = sector_prices.reindex(all_dates)
+    # This ensures we have S&P data for all dates, but sectors can have NaN for early dates.
+    # Both come from one batched download, so the indexes normally match already
+    if not sector_prices.index.equals(spy_prices.index):
+        if sector_prices.index.isin(spy_prices.index).all():
+            sector_prices = sector_prices.reindex(spy_prices.index)
+        else:
+            # Both indexes are sorted, so union does a linear merge and stays sorted
+            all_dates = spy_prices.index.union(sector_prices.index)
+            spy_prices = spy_prices.reindex(all_dates)
+            sector_prices = sector_prices.reindex(all_dates)
     
     # Show date range info for each sector
     print(f"\n✓ Data prepared:")
@@ -152,6 +359,7 @@ def fetch_all_data(
         if not sector_dates.empty:
             print(f"    {sector:30s}: {sector_dates.index.min().date()} to {sector_dates.index.max().date()}")
     
+    _FETCH_ALL_CACHE[cache_key] = (spy_prices, sector_prices)
     return spy_prices, sector_prices
 
 
@@ -163,20 +371,24 @@ def get_data_info(spy_prices: pd.Series, sector_prices: pd.DataFrame) -> None:
         spy_prices: S&P 500 price series
         sector_prices: Sector prices DataFrame
     """
-    print("\n" + "="*60)
-    print("DATA SUMMARY")
-    print("="*60)
-    print(f"S&P 500 (SPY):")
-    print(f"  Date range: {spy_prices.index.min().date()} to {spy_prices.index.max().date()}")
-    print(f"  Total days: {len(spy_prices)}")
-    print(f"  Missing values: {spy_prices.isna().sum()}")
-    
-    print(f"\nSectors ({len(sector_prices.columns)} total):")
-    for sector in sector_prices.columns:
-        missing = sector_prices[sector].isna().sum()
-        print(f"  {sector:30s}: {len(sector_prices)} days, {missing} missing")
-    
-    print("="*60 + "\n")
+    buf = io.StringIO()
+    buf.write("\n" + "="*60 + "\n")
+    buf.write("DATA SUMMARY\n")
+    buf.write("="*60 + "\n")
+    buf.write(f"S&P 500 (SPY):\n")
+    buf.write(f"  Date range: {spy_prices.index.min().date()} to {spy_prices.index.max().date()}\n")
+    buf.write(f"  Total days: {len(spy_prices)}\n")
+    buf.write(f"  Missing values: {spy_prices.isna().sum()}\n")
+    
+    buf.write(f"\nSectors ({len(sector_prices.columns)} total):\n")
+    missing = sector_prices.isna().sum()
+    total_days = len(sector_prices)
+    for sector, n_missing in missing.items():
+        buf.write(f"  {sector:30s}: {total_days} days, {n_missing} missing\n")
+    
+    buf.write("="*60 + "\n\n")
+    
+    sys.stdout.write(buf.getvalue())
 
 
 def inspect_sector_data(spy_prices: pd.Series, sector_prices: pd.DataFrame) -> None:
@@ -187,39 +399,43 @@ def inspect_sector_data(spy_prices: pd.Series, sector_prices: pd.DataFrame) -> N
         spy_prices: S&P 500 price series
         sector_prices: Sector prices DataFrame
     """
-    print("\n" + "="*60)
-    print("DATA TYPE INSPECTION")
-    print("="*60)
+    buf = io.StringIO()
+    buf.write("\n" + "="*60 + "\n")
+    buf.write("DATA TYPE INSPECTION\n")
+    buf.write("="*60 + "\n")
     
     # S&P 500 data info
-    print("\n📊 S&P 500 (SPY) Data:")
-    print(f"  Type: {type(spy_prices)}")
-    print(f"  Data type: {spy_prices.dtype}")
-    print(f"  Index type: {type(spy_prices.index)}")
-    print(f"  Shape: {spy_prices.shape}")
-    print(f"  Sample values:")
-    print(spy_prices.head(3))
-    print(f"  Min value: ${spy_prices.min():.2f}")
-    print(f"  Max value: ${spy_prices.max():.2f}")
+    buf.write("\n📊 S&P 500 (SPY) Data:\n")
+    buf.write(f"  Type: {type(spy_prices)}\n")
+    buf.write(f"  Data type: {spy_prices.dtype}\n")
+    buf.write(f"  Index type: {type(spy_prices.index)}\n")
+    buf.write(f"  Shape: {spy_prices.shape}\n")
+    buf.write(f"  Sample values:\n")
+    buf.write(f"{spy_prices.head(3)}\n")
+    buf.write(f"  Min value: ${spy_prices.min():.2f}\n")
+    buf.write(f"  Max value: ${spy_prices.max():.2f}\n")
     
     # Sector data info
-    print("\n📊 Sector Data:")
-    print(f"  Type: {type(sector_prices)}")
-    print(f"  Shape: {sector_prices.shape} (rows, columns)")
-    print(f"  Columns: {list(sector_prices.columns)}")
-    print(f"  Index type: {type(sector_prices.index)}")
-    print(f"  Data types per column:")
-    for col in sector_prices.columns:
-        print(f"    {col:30s}: {sector_prices[col].dtype}")
-    
-    print(f"\n  Sample values (first 3 rows):")
-    print(sector_prices.head(3))
-    
-    print(f"\n  Price ranges per sector:")
-    for col in sector_prices.columns:
-        print(f"    {col:30s}: ${sector_prices[col].min():7.2f} - ${sector_prices[col].max():7.2f}")
-    
-    print("="*60 + "\n")
+    buf.write("\n📊 Sector Data:\n")
+    buf.write(f"  Type: {type(sector_prices)}\n")
+    buf.write(f"  Shape: {sector_prices.shape} (rows, columns)\n")
+    buf.write(f"  Columns: {list(sector_prices.columns)}\n")
+    buf.write(f"  Index type: {type(sector_prices.index)}\n")
+    buf.write(f"  Data types per column:\n")
+    for col, dtype in sector_prices.dtypes.items():
+        buf.write(f"    {col:30s}: {dtype}\n")
+    
+    buf.write(f"\n  Sample values (first 3 rows):\n")
+    buf.write(f"{sector_prices.head(3)}\n")
+    
+    buf.write(f"\n  Price ranges per sector:\n")
+    ranges = sector_prices.agg(['min', 'max']).T
+    for col, low, high in ranges.itertuples():
+        buf.write(f"    {col:30s}: ${low:7.2f} - ${high:7.2f}\n")
+    
+    buf.write("="*60 + "\n\n")
+    
+    sys.stdout.write(buf.getvalue())
 
 
 if __name__ == "__main__":
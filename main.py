@@ -5,27 +5,56 @@ This is the main script that will orchestrate the analysis.
 Currently in development - starting with data fetching.
 """
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from data_fetcher import fetch_all_data, get_data_info, inspect_sector_data
 from returns_calculator import (
-    calculate_returns,
-    calculate_deviation_returns,
-    clean_returns_data,
+    calculate_moving_averages,
+    compute_pipeline,
     get_returns_summary
 )
 from visualizer import (
+    HEADLESS,
     plot_deviation_returns,
     plot_cumulative_deviations,
     plot_sector_subplots,
     plot_deviation_returns_plotly,
     plot_cumulative_deviations_plotly,
     plot_sector_subplots_plotly,
-    plot_moving_average_plotly_50day,
-    plot_moving_average_plotly_100day,
-    plot_moving_average_plotly_170day
+    plot_moving_average_plotly
 )
 
 
+# Maximum worker processes used to render plots in parallel (capped at the CPU count)
+PLOT_WORKERS = 4
+
+# Moving average windows (days) plotted in Phase 3
+MOVING_AVERAGE_WINDOWS = (50, 100, 170)
+
+
+def _init_plot_worker() -> None:
+    """
+    Configure a headless plot worker process to render off-screen with Agg.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render(plot_func, *args, **kwargs) -> None:
+    """
+    Run one plot function in a worker process.
+    
+    The returned figure is dropped so it isn't pickled back to the parent.
+    
+    Args:
+        plot_func: Plotting function from the visualizer module
+        *args, **kwargs: Arguments passed to plot_func
+    """
+    plot_func(*args, **kwargs)
+
+
 def main():
     """
     Main function - will be built out step by step.
@@ -46,16 +75,13 @@ def main():
     # Phase 2: Returns Calculation
     print("\n[Phase 2] Calculating returns...")
     
-    # Convert prices to returns
-    spy_returns = calculate_returns(spy_prices)
-    sector_returns = calculate_returns(sector_prices)
+    # Calculate returns and daily/cumulative deviation returns (sector - S&P) in one pass
+    spy_returns, sector_returns, deviation_returns, cumulative_deviations = compute_pipeline(
+        spy_prices, sector_prices
+    )
     
-    # Clean NaN values (from first day)
-    spy_returns = clean_returns_data(spy_returns)
-    sector_returns = clean_returns_data(sector_returns)
-    
-    # Calculate deviation returns (sector returns - S&P returns)
-    deviation_returns = calculate_deviation_returns(sector_returns, spy_returns)
+    # Moving averages are computed once here and shared with the plots
+    moving_averages = calculate_moving_averages(deviation_returns, MOVING_AVERAGE_WINDOWS)
     
     # Display returns summary
     get_returns_summary(spy_returns, sector_returns, deviation_returns)
@@ -65,20 +91,54 @@ def main():
     # Phase 3: Visualization
     print("\n[Phase 3] Creating visualizations...")
     
-    # Create interactive Plotly plots (HTML files for hosting)
-    print("\nCreating interactive Plotly plots...")
-    plot_deviation_returns_plotly(deviation_returns)
-    plot_cumulative_deviations_plotly(deviation_returns)
-    plot_sector_subplots_plotly(deviation_returns)
-    plot_moving_average_plotly_50day(deviation_returns, window=50)
-    plot_moving_average_plotly_100day(deviation_returns, window=100)
-    plot_moving_average_plotly_170day(deviation_returns, window=170)
-    
-    # Optional: Also create static matplotlib plots
-    print("\nCreating static matplotlib plots...")
-    plot_deviation_returns(deviation_returns)
-    plot_cumulative_deviations(deviation_returns)
-    plot_sector_subplots(deviation_returns)
+    # Interactive Plotly plots (HTML files for hosting) and static matplotlib plots.
+    # Each plot is independent and writes its own file, so they can render in parallel
+    plotly_jobs = [
+        (plot_deviation_returns_plotly, (deviation_returns,), {}),
+        (plot_cumulative_deviations_plotly, (deviation_returns,), {'cumulative_deviations': cumulative_deviations}),
+        (plot_sector_subplots_plotly, (deviation_returns,), {}),
+        *[
+            (plot_moving_average_plotly, (deviation_returns, window),
+             {'save_path': f'{window}day.html', 'moving_avg': moving_averages[window]})
+            for window in MOVING_AVERAGE_WINDOWS
+        ]
+    ]
+    matplotlib_jobs = [
+        (plot_deviation_returns, (deviation_returns,), {}),
+        (plot_cumulative_deviations, (deviation_returns,), {'cumulative_deviations': cumulative_deviations}),
+        (plot_sector_subplots, (deviation_returns,), {})
+    ]
+    
+    # Matplotlib figures are shown on screen unless HEADLESS, which only the
+    # parent process can do, so in that case they render here after the pool
+    if HEADLESS:
+        pool_jobs, local_jobs = plotly_jobs + matplotlib_jobs, []
+    else:
+        pool_jobs, local_jobs = plotly_jobs, matplotlib_jobs
+    
+    workers = min(PLOT_WORKERS, os.cpu_count() or 1)
+    if workers > 1:
+        print(f"\nCreating plots ({workers} worker processes)...")
+        # spawn gives each worker a fresh interpreter instead of a forked copy of matplotlib state
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_plot_worker if HEADLESS else None
+        ) as executor:
+            futures = [
+                executor.submit(_render, plot_func, *args, **kwargs)
+                for plot_func, args, kwargs in pool_jobs
+            ]
+            # Re-raise any error from a worker
+            for future in futures:
+                future.result()
+    else:
+        # A single core gains nothing from worker processes, so render everything here
+        print("\nCreating plots...")
+        local_jobs = pool_jobs + local_jobs
+    
+    for plot_func, args, kwargs in local_jobs:
+        plot_func(*args, **kwargs)
     
     print("\nPhase 3 complete! All visualizations created.")
 
@@ -4,11 +4,15 @@ Returns Calculation Module for S&P 500 Sector Analysis
 This module handles:
 - Calculating daily returns from prices
 - Calculating deviation returns (sector returns - S&P 500 returns)
+- Computing returns and daily/cumulative deviations in one fused pass
+- Computing moving averages of deviation returns
 """
 
+import io
+import sys
 import pandas as pd
 import numpy as np
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
 
 
 def calculate_returns(prices: pd.DataFrame) -> pd.DataFrame:
@@ -25,8 +29,22 @@ def calculate_returns(prices: pd.DataFrame) -> pd.DataFrame:
         DataFrame or Series with daily returns (as decimals, e.g., 0.02 = 2%)
         First row will be NaN (no previous day to compare)
     """
-    returns = prices.pct_change()
-    return returns
+    # Work on the raw array: one division pass, no per-column pandas dispatch.
+    # Float prices keep their precision (float32 stays float32)
+    values = prices.to_numpy()
+    if values.dtype.kind != 'f':
+        values = values.astype(np.float64)
+    returns = np.empty_like(values)
+    returns[:1] = np.nan
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(values[1:], values[:-1], out=returns[1:])
+    returns[1:] -= 1.0
+    
+    if isinstance(prices, pd.Series):
+        return pd.Series(returns, index=prices.index, name=prices.name, copy=False)
+    
+    return pd.DataFrame(returns, index=prices.index, columns=prices.columns, copy=False)
 
 
 def calculate_deviation_returns(
@@ -47,6 +65,10 @@ def calculate_deviation_returns(
     Returns:
         DataFrame with deviation returns for each sector
     """
+    # Data from fetch_all_data already shares one index, so no alignment is needed
+    if sector_returns.index.equals(spy_returns.index):
+        return sector_returns.subtract(spy_returns, axis=0)
+    
     # Align to all dates (union), so each sector shows from its own start date
     # Sectors will have NaN for dates before they started trading
     all_dates = sector_returns.index.union(spy_returns.index).sort_values()
@@ -90,6 +112,119 @@ def clean_returns_data(returns: pd.DataFrame) -> pd.DataFrame:
     return cleaned
 
 
+def compute_pipeline(
+    spy_prices: pd.Series,
+    sector_prices: pd.DataFrame
+) -> Tuple[pd.Series, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Compute returns and daily/cumulative deviation returns directly from prices.
+    
+    Fuses calculate_returns, clean_returns_data, calculate_deviation_returns
+    and the cumulative sum into array passes over one aligned block, instead
+    of materializing an intermediate DataFrame at every step.
+    
+    Daily deviation: sector_t / sector_(t-1) - spy_t / spy_(t-1)
+    (the "- 1" of both returns cancels out)
+    
+    Args:
+        spy_prices: Series with S&P 500 prices (indexed by date)
+        sector_prices: DataFrame with prices for each sector (indexed by date)
+    
+    Returns:
+        Tuple of (S&P 500 returns, sector returns, daily deviation returns,
+        cumulative deviation returns). All drop the first date (no previous
+        day). Cumulative values skip NaN days like DataFrame.cumsum(), so
+        sectors start from their own first trading day.
+    """
+    # Align once; data from fetch_all_data already shares one index
+    if spy_prices.index.equals(sector_prices.index):
+        dates = spy_prices.index
+    else:
+        dates = spy_prices.index.intersection(sector_prices.index)
+    
+    # Keep float32 prices in float32, widen anything else to float64
+    dtype = np.result_type(spy_prices.dtype, *sector_prices.dtypes, np.float32)
+    spy = spy_prices.reindex(dates).to_numpy(dtype=dtype)
+    sectors = sector_prices.reindex(dates).to_numpy(dtype=dtype)
+    
+    # Price ratios are computed once and shared by the deviations and the returns
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sector_ratio = np.divide(sectors[1:], sectors[:-1])
+        spy_ratio = np.divide(spy[1:], spy[:-1])
+    deviation = sector_ratio - spy_ratio[:, np.newaxis]
+    sector_ratio -= 1
+    spy_ratio -= 1
+    
+    missing = np.isnan(deviation)
+    cumulative = np.nancumsum(deviation, axis=0)
+    cumulative[missing] = np.nan
+    
+    spy_returns = pd.Series(spy_ratio, index=dates[1:], name=spy_prices.name, copy=False)
+    sector_returns = pd.DataFrame(
+        sector_ratio, index=dates[1:], columns=sector_prices.columns, copy=False
+    )
+    deviation_returns = pd.DataFrame(
+        deviation, index=dates[1:], columns=sector_prices.columns, copy=False
+    )
+    cumulative_deviations = pd.DataFrame(
+        cumulative, index=dates[1:], columns=sector_prices.columns, copy=False
+    )
+    
+    return spy_returns, sector_returns, deviation_returns, cumulative_deviations
+
+
+def calculate_moving_averages(
+    deviation_returns: pd.DataFrame,
+    windows: Iterable[int]
+) -> Dict[int, pd.DataFrame]:
+    """
+    Calculate rolling means of deviation returns for several window lengths.
+    
+    Computed once up front so every consumer of a window shares the result.
+    One cumulative sum is shared by all windows: each window mean is then
+    (cumsum[t] - cumsum[t - window]) / window, a single array subtraction.
+    Matches DataFrame.rolling(window).mean(): a mean is NaN whenever its
+    window contains a NaN.
+    
+    Args:
+        deviation_returns: DataFrame with deviation returns for each sector
+        windows: Window lengths in days (e.g. 50, 100, 170)
+    
+    Returns:
+        Dict mapping each window to a DataFrame of rolling means, aligned with
+        deviation_returns (NaN until a sector has a full window of data)
+    """
+    values = deviation_returns.to_numpy()
+    dtype = values.dtype if values.dtype.kind == 'f' else np.float64
+    n_rows, n_cols = values.shape
+    
+    # Leading zero row so window sums are a plain difference of two slices.
+    # Sums accumulate in float64 so the difference doesn't lose precision
+    missing = np.isnan(values)
+    cumulative = np.zeros((n_rows + 1, n_cols), dtype=np.float64)
+    np.cumsum(np.where(missing, 0.0, values), axis=0, out=cumulative[1:])
+    missing_count = np.zeros((n_rows + 1, n_cols), dtype=np.intp)
+    np.cumsum(missing, axis=0, out=missing_count[1:])
+    
+    moving_averages = {}
+    for window in windows:
+        means = np.full((n_rows, n_cols), np.nan, dtype=np.float64)
+        if window <= n_rows:
+            window_means = means[window - 1:]
+            np.subtract(cumulative[window:], cumulative[:-window], out=window_means)
+            window_means /= window
+            window_means[missing_count[window:] > missing_count[:-window]] = np.nan
+        
+        moving_averages[window] = pd.DataFrame(
+            means.astype(dtype, copy=False),
+            index=deviation_returns.index,
+            columns=deviation_returns.columns,
+            copy=False
+        )
+    
+    return moving_averages
+
+
 def get_returns_summary(
     spy_returns: pd.Series,
     sector_returns: pd.DataFrame,
@@ -103,39 +238,42 @@ def get_returns_summary(
         sector_returns: Sector returns
         deviation_returns: Deviation returns
     """
-    print("\n" + "="*60)
-    print("RETURNS SUMMARY")
-    print("="*60)
+    buf = io.StringIO()
+    buf.write("\n" + "="*60 + "\n")
+    buf.write("RETURNS SUMMARY\n")
+    buf.write("="*60 + "\n")
     
     # S&P 500 returns stats
-    print(f"\nS&P 500 Returns:")
-    print(f"  Total days: {len(spy_returns)}")
-    print(f"  Mean daily return: {spy_returns.mean():.4%}")
-    print(f"  Std deviation: {spy_returns.std():.4%}")
-    print(f"  Min return: {spy_returns.min():.4%}")
-    print(f"  Max return: {spy_returns.max():.4%}")
+    buf.write(f"\nS&P 500 Returns:\n")
+    buf.write(f"  Total days: {len(spy_returns)}\n")
+    buf.write(f"  Mean daily return: {spy_returns.mean():.4%}\n")
+    buf.write(f"  Std deviation: {spy_returns.std():.4%}\n")
+    buf.write(f"  Min return: {spy_returns.min():.4%}\n")
+    buf.write(f"  Max return: {spy_returns.max():.4%}\n")
     
     # Sector returns stats
-    print(f"\nSector Returns (mean daily return per sector):")
-    for sector in sector_returns.columns:
-        mean_ret = sector_returns[sector].mean()
-        std_ret = sector_returns[sector].std()
-        print(f"  {sector:30s}: {mean_ret:7.4%} (std: {std_ret:.4%})")
+    buf.write(f"\nSector Returns (mean daily return per sector):\n")
+    sector_stats = sector_returns.agg(['mean', 'std']).T
+    buf.write("\n".join(
+        f"  {sector:30s}: {mean_ret:7.4%} (std: {std_ret:.4%})"
+        for sector, mean_ret, std_ret in sector_stats.itertuples()
+    ) + "\n")
     
     # Deviation returns stats
-    print(f"\nDeviation Returns (mean deviation per sector):")
-    for sector in deviation_returns.columns:
-        mean_dev = deviation_returns[sector].mean()
-        std_dev = deviation_returns[sector].std()
-        print(f"  {sector:30s}: {mean_dev:7.4%} (std: {std_dev:.4%})")
+    buf.write(f"\nDeviation Returns (mean deviation per sector):\n")
+    deviation_stats = deviation_returns.agg(['mean', 'std']).T
+    for sector, mean_dev, std_dev in deviation_stats.itertuples():
+        buf.write(f"  {sector:30s}: {mean_dev:7.4%} (std: {std_dev:.4%})\n")
         if mean_dev > 0:
-            print(f"    → On average, {sector} outperformed S&P 500")
+            buf.write(f"    → On average, {sector} outperformed S&P 500\n")
         elif mean_dev < 0:
-            print(f"    → On average, {sector} underperformed S&P 500")
+            buf.write(f"    → On average, {sector} underperformed S&P 500\n")
         else:
-            print(f"    → On average, {sector} matched S&P 500")
+            buf.write(f"    → On average, {sector} matched S&P 500\n")
+    
+    buf.write("="*60 + "\n\n")
     
-    print("="*60 + "\n")
+    sys.stdout.write(buf.getvalue())
 
 
 if __name__ == "__main__":
@@ -2,16 +2,299 @@
 Visualization Module for S&P 500 Sector Analysis
 
 This module handles plotting deviation returns and other visualizations.
+
+matplotlib and Plotly are imported inside the functions that use them, so
+importing this module (or using only one plotting library) stays cheap.
 """
 
+from __future__ import annotations
+
+import functools
+import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Optional
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.express as px
+from returns_calculator import calculate_moving_averages
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    import plotly.graph_objects as go
+
+# Headless runs (e.g. CI) render off-screen with Agg and save web-resolution PNGs
+HEADLESS = os.environ.get('HEADLESS', '').strip().lower() in ('1', 'true', 'yes')
+
+
+# Points kept per series when a long history is downsampled for display.
+# Only histories longer than 4 * LTTB_POINTS rows are downsampled; the ~17-year
+# daily history used by main.py (~4400 rows) is plotted in full, so its HTML
+# output is not reduced by this.
+LTTB_POINTS = 2000
+
+# Resolution of saved PNGs
+SAVE_DPI = 100 if HEADLESS else 300
+
+# Matplotlib figures reused across static plots, one per figure size
+_FIG_POOL: Dict[tuple, plt.Figure] = {}
+
+
+@functools.lru_cache(maxsize=1)
+def _pyplot():
+    """
+    Import matplotlib.pyplot on first use, selecting Agg for headless runs.
+    
+    Returns:
+        The matplotlib.pyplot module
+    """
+    import matplotlib
+    if HEADLESS:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def __getattr__(name: str):
+    """
+    Resolve the plotting modules this module used to import eagerly (PEP 562).
+    
+    Keeps `visualizer.plt`, `visualizer.go`, etc. working without paying their
+    import cost until they are actually accessed.
+    """
+    if name == 'plt':
+        return _pyplot()
+    if name == 'mdates':
+        import matplotlib.dates as mdates
+        return mdates
+    if name == 'go':
+        import plotly.graph_objects as go
+        return go
+    if name == 'make_subplots':
+        from plotly.subplots import make_subplots
+        return make_subplots
+    if name == 'px':
+        import plotly.express as px
+        return px
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=32)
+def _mpl_colors(n: int) -> np.ndarray:
+    """
+    Get n evenly spaced tab20 colors, sampling the colormap only once per n.
+    
+    Args:
+        n: Number of colors (one per sector)
+    
+    Returns:
+        Array of RGBA colors with shape (n, 4)
+    """
+    return _pyplot().cm.tab20(np.linspace(0, 1, n))
+
+
+@functools.lru_cache(maxsize=1)
+def _plotly_palette() -> tuple:
+    """
+    Get the qualitative color list used by the Plotly plots, built only once.
+    
+    Returns:
+        Tuple of color strings (Set3 followed by Pastel)
+    """
+    from plotly.colors import qualitative
+    return tuple(qualitative.Set3 + qualitative.Pastel)
+
+
+def _hover_template(label: str) -> str:
+    """
+    Build a Plotly hover template that labels the y value with the trace name.
+    
+    The name is filled in by plotly.js at render time (%{fullData.name}), so
+    every trace in a figure can share the same template string.
+    
+    Args:
+        label: Name of the plotted quantity (e.g. 'Deviation')
+    
+    Returns:
+        Hover template string
+    """
+    return f'<b>%{{fullData.name}}</b><br>Date: %{{x}}<br>{label}: %{{y:.2f}}%<extra></extra>'
+
+
+# Hover template shared by the plain deviation plots
+HOVER_TMPL = _hover_template('Deviation')
+
+
+def _get_figure(figsize: tuple) -> plt.Figure:
+    """
+    Get a pooled matplotlib figure of the given size, cleared for a new plot.
+    
+    Reusing figures avoids rebuilding the canvas and pyplot state per plot, and
+    keeps pyplot from accumulating figures when plots are made in a batch. A
+    pooled figure that was closed (e.g. its window was shut) is replaced.
+    
+    Args:
+        figsize: Figure size (width, height) in inches
+    
+    Returns:
+        Empty matplotlib Figure
+    """
+    plt = _pyplot()
+    key = tuple(figsize)
+    fig = _FIG_POOL.get(key)
+    if fig is None or not plt.fignum_exists(fig.number):
+        fig = plt.figure(figsize=key)
+        _FIG_POOL[key] = fig
+    else:
+        fig.clf()
+    return fig
+
+
+def _save_and_show(fig: plt.Figure, save_path: Optional[str]) -> None:
+    """
+    Save a finished figure (if a path is given) and display it on screen.
+    
+    Layout must already be final: saving skips bbox_inches='tight', which would
+    render the figure a second time. PNGs use zlib level 1, which encodes
+    several times faster than the default level 6 for slightly larger files.
+    Nothing is shown under the Agg backend.
+    
+    Args:
+        fig: Figure to save and show
+        save_path: Path to save the plot (None to not save)
+    """
+    if save_path:
+        fig.savefig(save_path, dpi=SAVE_DPI, pil_kwargs={'compress_level': 1})
+        print(f"✓ Plot saved to {save_path}")
+    
+    import matplotlib
+    if matplotlib.get_backend().lower() != 'agg':
+        _pyplot().show()
+
+
+def _save_html(fig: go.Figure, save_path: str) -> None:
+    """
+    Write a Plotly figure to a standalone HTML file.
+    
+    plotly.js is loaded from the CDN instead of being inlined, which keeps each
+    file ~3 MB smaller and lets the browser cache the library across pages.
+    Validation is skipped since the traces are built by this module.
+    
+    Args:
+        fig: Figure to write
+        save_path: Path of the HTML file
+    """
+    fig.write_html(save_path, include_plotlyjs='cdn', full_html=True, validate=False)
+
+
+def _to_percent(frame: pd.DataFrame) -> np.ndarray:
+    """
+    Convert a frame of returns to percent in a single owned float32 buffer.
+    
+    Args:
+        frame: DataFrame of returns (fractions), one column per series
+    
+    Returns:
+        2D float32 array of the values times 100
+    """
+    pct = frame.to_numpy(dtype=np.float32, copy=True)
+    pct *= np.float32(100.0)
+    return pct
+
+
+def _lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Pick the points to keep with Largest-Triangle-Three-Buckets downsampling.
+    
+    Args:
+        x: 1D array of x values (e.g. days since the first date), ascending
+        y: 1D array of y values, same length as x, without NaN
+        n_out: Number of points to keep
+    
+    Returns:
+        Sorted integer positions of the kept points
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    xs = np.asarray(x, dtype=np.float64)
+    ys = np.asarray(y, dtype=np.float64)
+    
+    # n_out - 2 buckets between the (always kept) first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = xs[next_lo:next_hi].mean()
+        avg_y = ys[next_lo:next_hi].mean()
+        
+        area = np.abs(
+            (xs[a] - avg_x) * (ys[lo:hi] - ys[a])
+            - (xs[a] - xs[lo:hi]) * (avg_y - ys[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    
+    return keep
+
+
+def _decimate(index: pd.DatetimeIndex, values: np.ndarray, n_out: int = LTTB_POINTS) -> list:
+    """
+    Choose the rows to plot for each series of a long date-indexed block.
+    
+    Each column is downsampled with LTTB on its own, so every series keeps its
+    own extremes. A column is split at its NaN runs and each run is downsampled
+    separately, with one NaN row kept between runs so lines still break across
+    data gaps. Histories up to 4 * n_out rows are plotted in full.
+    
+    Args:
+        index: Dates of the rows
+        values: 2D array with one column per series
+        n_out: Number of points to keep per series
+    
+    Returns:
+        One row selector per column, usable as values[rows, j] and index[rows]
+    """
+    n_series = values.shape[1]
+    if len(index) <= 4 * n_out:
+        return [slice(None)] * n_series
+    
+    # Days since the first date; LTTB areas only depend on relative x spacing
+    x = np.asarray((index - index[0]) / pd.Timedelta(days=1))
+    selected = []
+    for j in range(n_series):
+        col = values[:, j]
+        valid = ~np.isnan(col)
+        n_valid = int(valid.sum())
+        
+        # Start/end positions of each run of non-NaN values
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], valid, [False]))))
+        parts = []
+        for start, end in zip(edges[::2], edges[1::2]):
+            if parts:
+                parts.append(np.array([start - 1]))  # NaN row marking the gap
+            n_run = max(3, round(n_out * (end - start) / n_valid))
+            parts.append(start + _lttb(x[start:end], col[start:end], n_run))
+        selected.append(np.concatenate(parts) if parts else np.arange(0))
+    return selected
+
+
+def _hovermode(rows: list) -> str:
+    """
+    Get the Plotly hover mode for traces plotted from _decimate row selectors.
+    
+    Unified hover lists every trace at one x value, so it is only used when no
+    series was downsampled (all traces share the same dates).
+    
+    Args:
+        rows: Row selectors returned by _decimate
+    
+    Returns:
+        'x unified', or 'x' when the traces have different x values
+    """
+    return 'x unified' if all(isinstance(r, slice) for r in rows) else 'x'
 
 
 def plot_deviation_returns(
@@ -27,42 +310,49 @@ def plot_deviation_returns(
         save_path: Path to save the plot (None to not save)
         figsize: Figure size (width, height) in inches
     """
-    plt.figure(figsize=figsize)
+    import matplotlib.dates as mdates
+    
+    fig = _get_figure(figsize)
+    ax = fig.subplots()
     
     # Define colors for each sector (distinct colors)
-    colors = plt.cm.tab20(np.linspace(0, 1, len(deviation_returns.columns)))
+    colors = _mpl_colors(len(deviation_returns.columns))
     
-    # Plot each sector
-    for i, sector in enumerate(deviation_returns.columns):
-        plt.plot(
-            deviation_returns.index,
-            deviation_returns[sector] * 100,  # Convert to percentage
-            label=sector,
-            alpha=0.7,
-            linewidth=1.5,
-            color=colors[i]
-        )
+    pct = _to_percent(deviation_returns)
+    rows = _decimate(deviation_returns.index, pct)
+    xnum = mdates.date2num(deviation_returns.index)
+    
+    # Plot all sectors in one call (one x, y pair per sector), then color them
+    lines = ax.plot(
+        *[arr for i, r in enumerate(rows) for arr in (xnum[r], pct[r, i])],
+        alpha=0.7,
+        linewidth=1.5
+    )
+    for line, color in zip(lines, colors):
+        line.set_color(color)
     
     # Add zero reference line
-    plt.axhline(y=0, color='black', linestyle='--', linewidth=1, alpha=0.5, zorder=0)
+    ax.axhline(y=0, color='black', linestyle='--', linewidth=1, alpha=0.5, zorder=0)
     
     # Formatting
-    plt.title(
+    ax.set_title(
         'S&P Sector Deviation Returns vs S&P 500 Over Time',
         fontsize=16,
         fontweight='bold',
         pad=20
     )
-    plt.xlabel('Date', fontsize=12)
-    plt.ylabel('Deviation Returns (%)', fontsize=12)
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Deviation Returns (%)', fontsize=12)
     
     # Format x-axis dates
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    plt.gca().xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-    plt.xticks(rotation=45)
-    
-    # Legend
-    plt.legend(
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+    ax.tick_params(axis='x', labelrotation=45)
+    
+    # Legend from the plotted lines directly (no search of the axes' artists)
+    ax.legend(
+        lines,
+        list(deviation_returns.columns),
         loc='upper left',
         ncol=2,
         fontsize=9,
@@ -70,23 +360,20 @@ def plot_deviation_returns(
     )
     
     # Grid
-    plt.grid(True, alpha=0.3, linestyle='--')
+    ax.grid(True, alpha=0.3, linestyle='--')
     
     # Tight layout
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Save if path provided
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"✓ Plot saved to {save_path}")
-    
-    plt.show()
+    _save_and_show(fig, save_path)
 
 
 def plot_cumulative_deviations(
     deviation_returns: pd.DataFrame,
     save_path: Optional[str] = 'cumulative_deviations.png',
-    figsize: tuple = (16, 10)
+    figsize: tuple = (16, 10),
+    cumulative_deviations: Optional[pd.DataFrame] = None
 ) -> None:
     """
     Plot cumulative deviation returns over time.
@@ -97,46 +384,54 @@ def plot_cumulative_deviations(
         deviation_returns: DataFrame with deviation returns
         save_path: Path to save the plot (None to not save)
         figsize: Figure size (width, height) in inches
+        cumulative_deviations: Precomputed cumulative deviations (None to compute here)
     """
-    plt.figure(figsize=figsize)
+    import matplotlib.dates as mdates
+    
+    fig = _get_figure(figsize)
+    ax = fig.subplots()
     
-    # Calculate cumulative sum
-    cumulative_deviations = deviation_returns.cumsum() * 100  # Convert to percentage
+    # Calculate cumulative sum (unless already computed by the caller)
+    if cumulative_deviations is None:
+        cumulative_deviations = deviation_returns.cumsum()
+    pct = _to_percent(cumulative_deviations)
+    rows = _decimate(cumulative_deviations.index, pct)
+    xnum = mdates.date2num(cumulative_deviations.index)
     
     # Define colors for each sector
-    colors = plt.cm.tab20(np.linspace(0, 1, len(cumulative_deviations.columns)))
-    
-    # Plot each sector
-    for i, sector in enumerate(cumulative_deviations.columns):
-        plt.plot(
-            cumulative_deviations.index,
-            cumulative_deviations[sector],
-            label=sector,
-            alpha=0.7,
-            linewidth=2,
-            color=colors[i]
-        )
+    colors = _mpl_colors(len(cumulative_deviations.columns))
+    
+    # Plot all sectors in one call (one x, y pair per sector), then color them
+    lines = ax.plot(
+        *[arr for i, r in enumerate(rows) for arr in (xnum[r], pct[r, i])],
+        alpha=0.7,
+        linewidth=2
+    )
+    for line, color in zip(lines, colors):
+        line.set_color(color)
     
     # Add zero reference line
-    plt.axhline(y=0, color='black', linestyle='--', linewidth=1, alpha=0.5, zorder=0)
+    ax.axhline(y=0, color='black', linestyle='--', linewidth=1, alpha=0.5, zorder=0)
     
     # Formatting
-    plt.title(
+    ax.set_title(
         'Cumulative Deviation Returns: Sectors vs S&P 500',
         fontsize=16,
         fontweight='bold',
         pad=20
     )
-    plt.xlabel('Date', fontsize=12)
-    plt.ylabel('Cumulative Deviation Returns (%)', fontsize=12)
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Cumulative Deviation Returns (%)', fontsize=12)
     
     # Format x-axis dates
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    plt.gca().xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-    plt.xticks(rotation=45)
-    
-    # Legend
-    plt.legend(
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+    ax.tick_params(axis='x', labelrotation=45)
+    
+    # Legend from the plotted lines directly (no search of the axes' artists)
+    ax.legend(
+        lines,
+        list(cumulative_deviations.columns),
         loc='upper left',
         ncol=2,
         fontsize=9,
@@ -144,17 +439,13 @@ def plot_cumulative_deviations(
     )
     
     # Grid
-    plt.grid(True, alpha=0.3, linestyle='--')
+    ax.grid(True, alpha=0.3, linestyle='--')
     
     # Tight layout
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Save if path provided
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"✓ Plot saved to {save_path}")
-    
-    plt.show()
+    _save_and_show(fig, save_path)
 
 
 def plot_sector_subplots(
@@ -170,23 +461,33 @@ def plot_sector_subplots(
         save_path: Path to save the plot (None to not save)
         figsize: Figure size (width, height) in inches
     """
+    import matplotlib.dates as mdates
+    
+    plt = _pyplot()
+    
     n_sectors = len(deviation_returns.columns)
     n_cols = 3
     n_rows = (n_sectors + n_cols - 1) // n_cols  # Ceiling division
     
-    fig, axes = plt.subplots(n_rows, n_cols, figsize=figsize)
-    axes = axes.flatten() if n_sectors > 1 else [axes]
+    fig = _get_figure(figsize)
+    axes = fig.subplots(n_rows, n_cols, sharex=True, squeeze=False).flatten()
     
     # Define colors
-    colors = plt.cm.tab20(np.linspace(0, 1, n_sectors))
+    colors = _mpl_colors(n_sectors)
+    
+    pct = _to_percent(deviation_returns)
+    rows = _decimate(deviation_returns.index, pct)
+    
+    # Convert dates to matplotlib day numbers once, not in every ax.plot call
+    xnum = mdates.date2num(deviation_returns.index)
     
     for i, sector in enumerate(deviation_returns.columns):
         ax = axes[i]
         
         # Plot this sector
         ax.plot(
-            deviation_returns.index,
-            deviation_returns[sector] * 100,  # Convert to percentage
+            xnum[rows[i]],
+            pct[rows[i], i],
             color=colors[i],
             linewidth=1.5,
             alpha=0.8
@@ -199,16 +500,21 @@ def plot_sector_subplots(
         ax.set_title(sector, fontsize=11, fontweight='bold')
         ax.set_ylabel('Deviation (%)', fontsize=9)
         ax.grid(True, alpha=0.3)
-        
-        # Format x-axis
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=6))
-        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    
+    # Format x-axis once: shared axes share one locator and formatter
+    axes[0].xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    axes[0].xaxis.set_major_locator(mdates.MonthLocator(interval=6))
     
     # Hide extra subplots
     for i in range(n_sectors, len(axes)):
         axes[i].set_visible(False)
     
+    # Date labels go on the lowest visible subplot of each column, which is
+    # above the bottom row when the last row is only partly filled
+    for ax in axes[max(n_sectors - n_cols, 0):n_sectors]:
+        ax.xaxis.set_tick_params(labelbottom=True)
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    
     # Overall title
     fig.suptitle(
         'Deviation Returns by Sector (Individual Views)',
@@ -217,14 +523,10 @@ def plot_sector_subplots(
         y=0.995
     )
     
-    plt.tight_layout(rect=[0, 0, 1, 0.98])
+    fig.tight_layout(rect=[0, 0, 1, 0.98])
     
     # Save if path provided
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"✓ Plot saved to {save_path}")
-    
-    plt.show()
+    _save_and_show(fig, save_path)
 
 
 # ============================================================================
@@ -247,23 +549,28 @@ def plot_deviation_returns_plotly(
     Returns:
         Plotly Figure object
     """
+    import plotly.graph_objects as go
+    
+    pct = _to_percent(deviation_returns)
+    rows = _decimate(deviation_returns.index, pct)
+    
     fig = go.Figure()
     
     # Define colors for each sector
-    colors = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel
+    colors = _plotly_palette()
     
-    # Plot each sector
-    for i, sector in enumerate(deviation_returns.columns):
-        fig.add_trace(go.Scatter(
-            x=deviation_returns.index,
-            y=deviation_returns[sector] * 100,  # Convert to percentage
+    # Plot each sector (all traces added in one call)
+    fig.add_traces([
+        go.Scattergl(
+            x=deviation_returns.index[rows[i]],
+            y=pct[rows[i], i],
             mode='lines',
             name=sector,
             line=dict(width=2, color=colors[i % len(colors)]),
-            hovertemplate=f'<b>{sector}</b><br>' +
-                         'Date: %{x}<br>' +
-                         'Deviation: %{y:.2f}%<extra></extra>'
-        ))
+            hovertemplate=HOVER_TMPL
+        )
+        for i, sector in enumerate(deviation_returns.columns)
+    ])
     
     # Add zero reference line
     fig.add_hline(
@@ -284,7 +591,7 @@ def plot_deviation_returns_plotly(
         },
         xaxis_title='Date',
         yaxis_title='Deviation Returns (%)',
-        hovermode='x unified',
+        hovermode=_hovermode(rows),
         width=figsize[0],
         height=figsize[1],
         legend=dict(
@@ -309,7 +616,7 @@ def plot_deviation_returns_plotly(
     
     # Save if path provided
     if save_path:
-        fig.write_html(save_path)
+        _save_html(fig, save_path)
         print(f"✓ Interactive plot saved to {save_path}")
     
     return fig
@@ -318,7 +625,8 @@ def plot_deviation_returns_plotly(
 def plot_cumulative_deviations_plotly(
     deviation_returns: pd.DataFrame,
     save_path: Optional[str] = 'cumulative_deviations.html',
-    figsize: tuple = (1400, 800)
+    figsize: tuple = (1400, 800),
+    cumulative_deviations: Optional[pd.DataFrame] = None
 ) -> go.Figure:
     """
     Plot cumulative deviation returns over time using Plotly (interactive).
@@ -327,30 +635,39 @@ def plot_cumulative_deviations_plotly(
         deviation_returns: DataFrame with deviation returns
         save_path: Path to save the HTML file (None to not save)
         figsize: Figure size (width, height) in pixels
+        cumulative_deviations: Precomputed cumulative deviations (None to compute here)
     
     Returns:
         Plotly Figure object
     """
-    # Calculate cumulative sum
-    cumulative_deviations = deviation_returns.cumsum() * 100  # Convert to percentage
+    import plotly.graph_objects as go
+    
+    # Calculate cumulative sum (unless already computed by the caller)
+    if cumulative_deviations is None:
+        cumulative_deviations = deviation_returns.cumsum()
+    pct = _to_percent(cumulative_deviations)
+    rows = _decimate(cumulative_deviations.index, pct)
     
     fig = go.Figure()
     
     # Define colors
-    colors = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel
+    colors = _plotly_palette()
     
-    # Plot each sector
-    for i, sector in enumerate(cumulative_deviations.columns):
-        fig.add_trace(go.Scatter(
-            x=cumulative_deviations.index,
-            y=cumulative_deviations[sector],
+    # One hover template for all traces; Plotly fills in each trace's name
+    hover_tmpl = _hover_template('Cumulative Deviation')
+    
+    # Plot each sector (all traces added in one call)
+    fig.add_traces([
+        go.Scattergl(
+            x=cumulative_deviations.index[rows[i]],
+            y=pct[rows[i], i],
             mode='lines',
             name=sector,
             line=dict(width=2.5, color=colors[i % len(colors)]),
-            hovertemplate=f'<b>{sector}</b><br>' +
-                         'Date: %{x}<br>' +
-                         'Cumulative Deviation: %{y:.2f}%<extra></extra>'
-        ))
+            hovertemplate=hover_tmpl
+        )
+        for i, sector in enumerate(cumulative_deviations.columns)
+    ])
     
     # Add zero reference line
     fig.add_hline(
@@ -371,7 +688,7 @@ def plot_cumulative_deviations_plotly(
         },
         xaxis_title='Date',
         yaxis_title='Cumulative Deviation Returns (%)',
-        hovermode='x unified',
+        hovermode=_hovermode(rows),
         width=figsize[0],
         height=figsize[1],
         legend=dict(
@@ -396,7 +713,7 @@ def plot_cumulative_deviations_plotly(
     
     # Save if path provided
     if save_path:
-        fig.write_html(save_path)
+        _save_html(fig, save_path)
         print(f"✓ Interactive plot saved to {save_path}")
     
     return fig
@@ -418,6 +735,9 @@ def plot_sector_subplots_plotly(
     Returns:
         Plotly Figure object
     """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
     n_sectors = len(deviation_returns.columns)
     n_cols = 3
     n_rows = (n_sectors + n_cols - 1) // n_cols  # Ceiling division
@@ -432,38 +752,44 @@ def plot_sector_subplots_plotly(
     )
     
     # Define colors
-    colors = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel
+    colors = _plotly_palette()
     
-    # Plot each sector
-    for i, sector in enumerate(deviation_returns.columns):
-        row = (i // n_cols) + 1
-        col = (i % n_cols) + 1
-        
-        fig.add_trace(
+    pct = _to_percent(deviation_returns)
+    rows = _decimate(deviation_returns.index, pct)
+    
+    # Plot each sector in its grid cell (all traces added in one call)
+    fig.add_traces(
+        [
             go.Scatter(
-                x=deviation_returns.index,
-                y=deviation_returns[sector] * 100,  # Convert to percentage
+                x=deviation_returns.index[rows[i]],
+                y=pct[rows[i], i],
                 mode='lines',
                 name=sector,
                 line=dict(width=2, color=colors[i % len(colors)]),
                 showlegend=False,
-                hovertemplate=f'<b>{sector}</b><br>' +
-                             'Date: %{x}<br>' +
-                             'Deviation: %{y:.2f}%<extra></extra>'
-            ),
-            row=row,
-            col=col
-        )
-        
-        # Add zero line to each subplot
-        fig.add_hline(
-            y=0,
-            line_dash="dash",
-            line_color="black",
-            opacity=0.3,
-            row=row,
-            col=col
+                hovertemplate=HOVER_TMPL
+            )
+            for i, sector in enumerate(deviation_returns.columns)
+        ],
+        rows=[(i // n_cols) + 1 for i in range(n_sectors)],
+        cols=[(i % n_cols) + 1 for i in range(n_sectors)]
+    )
+    
+    # Add zero line to each subplot in one pass (subplot k uses axes xk/yk, row-major)
+    fig.layout.shapes = tuple(
+        dict(
+            type='line',
+            xref='x domain' if k == 1 else f'x{k} domain',
+            yref='y' if k == 1 else f'y{k}',
+            x0=0,
+            x1=1,
+            y0=0,
+            y1=0,
+            line=dict(dash='dash', color='black'),
+            opacity=0.3
         )
+        for k in range(1, n_sectors + 1)
+    )
     
     # Update layout
     fig.update_layout(
@@ -502,32 +828,40 @@ def plot_sector_subplots_plotly(
     
     # Save if path provided
     if save_path:
-        fig.write_html(save_path)
+        _save_html(fig, save_path)
         print(f"✓ Interactive plot saved to {save_path}")
     
     return fig
 
 
-def plot_moving_average_plotly_50day(
+def plot_moving_average_plotly(
     deviation_returns: pd.DataFrame,
-    window: int = 50,
-    save_path: Optional[str] = '50day.html',
-    figsize: tuple = (1400, 800)
+    window: int,
+    save_path: Optional[str] = None,
+    figsize: tuple = (1400, 800),
+    moving_avg: Optional[pd.DataFrame] = None
 ) -> go.Figure:
     """
-    Plot 50-day moving average of deviation returns for all sectors using Plotly.
+    Plot a rolling moving average of deviation returns for all sectors using Plotly.
     
     Args:
         deviation_returns: DataFrame with deviation returns (sector - S&P 500)
-        window: Number of days for moving average (default: 50)
+        window: Number of days for moving average
         save_path: Path to save the HTML file (None to not save)
         figsize: Figure size (width, height) in pixels
+        moving_avg: Precomputed rolling means for this window (None to compute here)
     
     Returns:
         Plotly Figure object
     """
-    # Calculate moving average
-    moving_avg = deviation_returns.rolling(window=window).mean()
+    import plotly.graph_objects as go
+    
+    # Calculate moving average (unless already computed by the caller)
+    if moving_avg is None:
+        moving_avg = calculate_moving_averages(deviation_returns, (window,))[window]
+    
+    pct = _to_percent(moving_avg)
+    rows = _decimate(moving_avg.index, pct)
     
     # Don't drop NaN rows globally - each sector should show from when it has data
     # Plotly will automatically skip NaN values when plotting
@@ -536,20 +870,23 @@ def plot_moving_average_plotly_50day(
     fig = go.Figure()
     
     # Define colors for each sector
-    colors = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel
+    colors = _plotly_palette()
+    
+    # One hover template for all traces; Plotly fills in each trace's name
+    hover_tmpl = _hover_template(f'{window}-Day MA')
     
-    # Plot each sector's moving average
-    for i, sector in enumerate(moving_avg.columns):
-        fig.add_trace(go.Scatter(
-            x=moving_avg.index,
-            y=moving_avg[sector] * 100,  # Convert to percentage
+    # Plot each sector's moving average (all traces added in one call)
+    fig.add_traces([
+        go.Scattergl(
+            x=moving_avg.index[rows[i]],
+            y=pct[rows[i], i],
             mode='lines',
             name=sector,
             line=dict(width=3, color=colors[i % len(colors)]),
-            hovertemplate=f'<b>{sector}</b><br>' +
-                         'Date: %{x}<br>' +
-                         f'{window}-Day MA: %{{y:.2f}}%<extra></extra>'
-        ))
+            hovertemplate=hover_tmpl
+        )
+        for i, sector in enumerate(moving_avg.columns)
+    ])
     
     # Add zero reference line
     fig.add_hline(
@@ -570,7 +907,7 @@ def plot_moving_average_plotly_50day(
         },
         xaxis_title='Date',
         yaxis_title=f'Deviation Returns - {window}-Day MA (%)',
-        hovermode='x unified',
+        hovermode=_hovermode(rows),
         width=figsize[0],
         height=figsize[1],
         legend=dict(
@@ -595,194 +932,86 @@ def plot_moving_average_plotly_50day(
     
     # Save if path provided
     if save_path:
-        fig.write_html(save_path)
+        _save_html(fig, save_path)
         print(f"✓ Interactive moving average plot saved to {save_path}")
     
     return fig
 
+
+def plot_moving_average_plotly_50day(
+    deviation_returns: pd.DataFrame,
+    window: int = 50,
+    save_path: Optional[str] = '50day.html',
+    figsize: tuple = (1400, 800),
+    moving_avg: Optional[pd.DataFrame] = None
+) -> go.Figure:
+    """
+    Plot 50-day moving average of deviation returns for all sectors using Plotly.
+    
+    Thin wrapper around plot_moving_average_plotly with this window's defaults.
+    
+    Args:
+        deviation_returns: DataFrame with deviation returns (sector - S&P 500)
+        window: Number of days for moving average (default: 50)
+        save_path: Path to save the HTML file (None to not save)
+        figsize: Figure size (width, height) in pixels
+        moving_avg: Precomputed rolling means for this window (None to compute here)
+    
+    Returns:
+        Plotly Figure object
+    """
+    return plot_moving_average_plotly(deviation_returns, window, save_path, figsize, moving_avg)
+
+
 def plot_moving_average_plotly_100day(
     deviation_returns: pd.DataFrame,
     window: int = 100,
     save_path: Optional[str] = '100day.html',
-    figsize: tuple = (1400, 800)
+    figsize: tuple = (1400, 800),
+    moving_avg: Optional[pd.DataFrame] = None
 ) -> go.Figure:
     """
     Plot 100-day moving average of deviation returns for all sectors using Plotly.
     
+    Thin wrapper around plot_moving_average_plotly with this window's defaults.
+    
     Args:
         deviation_returns: DataFrame with deviation returns (sector - S&P 500)
         window: Number of days for moving average (default: 100)
         save_path: Path to save the HTML file (None to not save)
         figsize: Figure size (width, height) in pixels
+        moving_avg: Precomputed rolling means for this window (None to compute here)
     
     Returns:
         Plotly Figure object
     """
-    # Calculate moving average
-    moving_avg = deviation_returns.rolling(window=window).mean()
-    
-    # Don't drop NaN rows globally - each sector should show from when it has data
-    # Plotly will automatically skip NaN values when plotting
-    # This allows sectors with different start dates to show their full history
-    
-    fig = go.Figure()
-    
-    # Define colors for each sector
-    colors = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel
-    
-    # Plot each sector's moving average
-    for i, sector in enumerate(moving_avg.columns):
-        fig.add_trace(go.Scatter(
-            x=moving_avg.index,
-            y=moving_avg[sector] * 100,  # Convert to percentage
-            mode='lines',
-            name=sector,
-            line=dict(width=3, color=colors[i % len(colors)]),
-            hovertemplate=f'<b>{sector}</b><br>' +
-                         'Date: %{x}<br>' +
-                         f'{window}-Day MA: %{{y:.2f}}%<extra></extra>'
-        ))
-    
-    # Add zero reference line
-    fig.add_hline(
-        y=0,
-        line_dash="dash",
-        line_color="black",
-        opacity=0.5,
-        annotation_text="S&P 500 Reference"
-    )
-    
-    # Update layout
-    fig.update_layout(
-        title={
-            'text': f'S&P Sector Deviation Returns - {window}-Day Moving Average',
-            'x': 0.5,
-            'xanchor': 'center',
-            'font': {'size': 20, 'family': 'Arial Black'}
-        },
-        xaxis_title='Date',
-        yaxis_title=f'Deviation Returns - {window}-Day MA (%)',
-        hovermode='x unified',
-        width=figsize[0],
-        height=figsize[1],
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1,
-            xanchor="left",
-            x=1.01
-        ),
-        template='plotly_white',
-        xaxis=dict(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor='lightgray'
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor='lightgray'
-        )
-    )
-    
-    # Save if path provided
-    if save_path:
-        fig.write_html(save_path)
-        print(f"✓ Interactive moving average plot saved to {save_path}")
-    
-    return fig
+    return plot_moving_average_plotly(deviation_returns, window, save_path, figsize, moving_avg)
+
 
 def plot_moving_average_plotly_170day(
     deviation_returns: pd.DataFrame,
     window: int = 170,
     save_path: Optional[str] = '170day.html',
-    figsize: tuple = (1400, 800)
+    figsize: tuple = (1400, 800),
+    moving_avg: Optional[pd.DataFrame] = None
 ) -> go.Figure:
     """
     Plot 170-day moving average of deviation returns for all sectors using Plotly.
     
+    Thin wrapper around plot_moving_average_plotly with this window's defaults.
+    
     Args:
         deviation_returns: DataFrame with deviation returns (sector - S&P 500)
         window: Number of days for moving average (default: 170)
         save_path: Path to save the HTML file (None to not save)
         figsize: Figure size (width, height) in pixels
+        moving_avg: Precomputed rolling means for this window (None to compute here)
     
     Returns:
         Plotly Figure object
     """
-    # Calculate moving average
-    moving_avg = deviation_returns.rolling(window=window).mean()
-    
-    # Don't drop NaN rows globally - each sector should show from when it has data
-    # Plotly will automatically skip NaN values when plotting
-    # This allows sectors with different start dates to show their full history
-    
-    fig = go.Figure()
-    
-    # Define colors for each sector
-    colors = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel
-    
-    # Plot each sector's moving average
-    for i, sector in enumerate(moving_avg.columns):
-        fig.add_trace(go.Scatter(
-            x=moving_avg.index,
-            y=moving_avg[sector] * 100,  # Convert to percentage
-            mode='lines',
-            name=sector,
-            line=dict(width=3, color=colors[i % len(colors)]),
-            hovertemplate=f'<b>{sector}</b><br>' +
-                         'Date: %{x}<br>' +
-                         f'{window}-Day MA: %{{y:.2f}}%<extra></extra>'
-        ))
-    
-    # Add zero reference line
-    fig.add_hline(
-        y=0,
-        line_dash="dash",
-        line_color="black",
-        opacity=0.5,
-        annotation_text="S&P 500 Reference"
-    )
-    
-    # Update layout
-    fig.update_layout(
-        title={
-            'text': f'S&P Sector Deviation Returns - {window}-Day Moving Average',
-            'x': 0.5,
-            'xanchor': 'center',
-            'font': {'size': 20, 'family': 'Arial Black'}
-        },
-        xaxis_title='Date',
-        yaxis_title=f'Deviation Returns - {window}-Day MA (%)',
-        hovermode='x unified',
-        width=figsize[0],
-        height=figsize[1],
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1,
-            xanchor="left",
-            x=1.01
-        ),
-        template='plotly_white',
-        xaxis=dict(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor='lightgray'
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor='lightgray'
-        )
-    )
-    
-    # Save if path provided
-    if save_path:
-        fig.write_html(save_path)
-        print(f"✓ Interactive moving average plot saved to {save_path}")
-    
-    return fig
+    return plot_moving_average_plotly(deviation_returns, window, save_path, figsize, moving_avg)
+
 
 if __name__ == "__main__":
     # Test the visualization module with sample data